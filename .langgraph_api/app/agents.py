@@ -1,7 +1,9 @@
 # app/agents.py
 from app.models import TwinState, AgentName, Message
 from app.document_store import DocumentStore
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Tuple
 import os
 
 
@@ -23,14 +25,47 @@ def _next_from_targets(state: TwinState, current: AgentName) -> Optional[AgentNa
         # If current not in target list, just end
         return None
 
+@lru_cache(maxsize=1)
+def _get_http_client():
+    """Keep-alive connection pool shared by every ChatOpenAI client.
+
+    Agents and GreenHillGPT all talk to the same host, so one pool lets them
+    reuse TCP/TLS connections instead of each client holding its own. The
+    short connect timeout fails fast on an unreachable endpoint.
+    """
+    import httpx
+
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        timeout=httpx.Timeout(60.0, connect=3.05),
+    )
+
+
+@lru_cache(maxsize=8)
+def _get_llm(model: str, temperature: float):
+    """Return a shared ChatOpenAI client per (model, temperature).
+
+    Client construction validates settings, so agents reuse one instance.
+    Failed constructions (e.g. no API key) raise and are not cached.
+    """
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        max_retries=2,
+        timeout=60,
+        http_client=_get_http_client(),
+    )
+
+
 def enhance_with_llm(prompt: str, context: str = "") -> str:
     """Enhance agent analysis with LLM if available"""
     try:
-        from langchain_openai import ChatOpenAI
         from langchain_core.messages import HumanMessage, SystemMessage
 
         model = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o")
-        llm = ChatOpenAI(model=model, temperature=0.1)
+        llm = _get_llm(model, 0.1)
 
         system_prompt = (
             "You are a domain expert for Green Hill Canarias. Provide concise, actionable insights."
@@ -50,115 +85,118 @@ def enhance_with_llm(prompt: str, context: str = "") -> str:
             f"Baseline analysis (LLM unavailable): {prompt}\n\nContext: {context[:300]}..."
         )
 
+# Static fields of each specialist's output; nodes add analysis and context_used
+_STRATEGY_BASE = MappingProxyType({
+    "strategic_focus": "EU-GMP compliance with ROI optimization",
+    "timeline": "~9 months",
+    "key_initiatives": (
+        "Regulatory alignment",
+        "Atlantic market positioning",
+        "Partnership development",
+    ),
+})
+_OPERATIONS_BASE = MappingProxyType({
+    "implementation_schedule": "Phased T0→T+9",
+    "resource_allocation": "Cross-functional core team",
+    "operational_framework": "Agile with quarterly reviews",
+})
+_FINANCE_BASE = MappingProxyType({
+    "roi_projection": "~24%",
+    "capex_estimate": 3200000,
+    "funding_strategy": "Mixed equity + partnerships",
+})
+_MARKET_BASE = MappingProxyType({
+    "market_opportunity": "Atlantic corridor with EU connectivity",
+    "growth_projection": "~12% CAGR",
+    "competitive_landscape": "Emerging, first-mover advantage possible",
+})
+_RISK_BASE = MappingProxyType({
+    "risk_assessment": "Medium, mitigable",
+    "primary_risks": ("Regulatory changes", "Market volatility", "Delays"),
+    "mitigations": ("Proactive monitoring", "Diversified approach", "Agile PM"),
+})
+_COMPLIANCE_BASE = MappingProxyType({
+    "regulatory_framework": "EU-GMP + Spanish requirements",
+    "timeline": "~6 months for certification",
+    "actions": ("SOPs update", "Internal audit", "Submission prep"),
+})
+_INNOVATION_BASE = MappingProxyType({
+    "innovation_roadmap": "Technology-driven sustainability",
+    "initiatives": ("AI optimization", "Sustainable tech", "Digital acceleration"),
+})
+
+def _query_context(doc_store: DocumentStore, query: str) -> Tuple[str, int]:
+    """Return the joined retrieval context and how many entries it holds."""
+    docs = doc_store.query_list(query)
+    return "\n\n".join(docs), len(docs)
+
 def strategy_node(state: TwinState, doc_store: DocumentStore) -> TwinState:
     """Strategic planning and long-term vision analysis"""
     q = state.question or ""
-    ctx = doc_store.query(f"strategy planning vision {q}")
+    ctx, n_docs = _query_context(doc_store, f"strategy planning vision {q}")
     analysis = enhance_with_llm(f"Strategic opportunities and positioning for: {q}", ctx)
-    output = {
-        "strategic_focus": "EU-GMP compliance with ROI optimization",
-        "timeline": "~9 months",
-        "key_initiatives": [
-            "Regulatory alignment",
-            "Atlantic market positioning",
-            "Partnership development",
-        ],
-        "analysis": analysis,
-        "context_used": len((ctx or "").split("\n\n")),
-    }
+    output = {**_STRATEGY_BASE, "analysis": analysis, "context_used": n_docs}
     record_output(state, AgentName.STRATEGY, "strategy_output", output, "Strategic analysis completed")
     state.next_agent = _next_from_targets(state, AgentName.STRATEGY)
     return state
 
 def operations_node(state: TwinState, doc_store: DocumentStore) -> TwinState:
     q = state.question or ""
-    ctx = doc_store.query(f"operations processes efficiency {q}")
+    ctx, n_docs = _query_context(doc_store, f"operations processes efficiency {q}")
     analysis = enhance_with_llm(f"Operational requirements and optimization for: {q}", ctx)
-    output = {
-        "implementation_schedule": "Phased T0→T+9",
-        "resource_allocation": "Cross-functional core team",
-        "operational_framework": "Agile with quarterly reviews",
-        "analysis": analysis,
-        "context_used": len((ctx or "").split("\n\n")),
-    }
+    output = {**_OPERATIONS_BASE, "analysis": analysis, "context_used": n_docs}
     record_output(state, AgentName.OPERATIONS, "operations_output", output, "Operations planning completed")
     state.next_agent = _next_from_targets(state, AgentName.OPERATIONS)
     return state
 
 def finance_node(state: TwinState, doc_store: DocumentStore) -> TwinState:
     q = state.question or ""
-    ctx = doc_store.query(f"finance investment funding {q}")
+    ctx, n_docs = _query_context(doc_store, f"finance investment funding {q}")
     analysis = enhance_with_llm(f"Financial implications and investment opportunities for: {q}", ctx)
-    output = {
-        "roi_projection": "~24%",
-        "capex_estimate": 3200000,
-        "funding_strategy": "Mixed equity + partnerships",
-        "analysis": analysis,
-        "context_used": len((ctx or "").split("\n\n")),
-    }
+    output = {**_FINANCE_BASE, "analysis": analysis, "context_used": n_docs}
     record_output(state, AgentName.FINANCE, "finance_output", output, "Financial modeling completed")
     state.next_agent = _next_from_targets(state, AgentName.FINANCE)
     return state
 
 def market_intel_node(state: TwinState, doc_store: DocumentStore) -> TwinState:
     q = state.question or ""
-    ctx = doc_store.query(f"market competition Canary Islands {q}")
+    ctx, n_docs = _query_context(doc_store, f"market competition Canary Islands {q}")
     analysis = enhance_with_llm(f"Market opportunities and competitive landscape for: {q}", ctx)
-    output = {
-        "market_opportunity": "Atlantic corridor with EU connectivity",
-        "growth_projection": "~12% CAGR",
-        "competitive_landscape": "Emerging, first-mover advantage possible",
-        "analysis": analysis,
-        "context_used": len((ctx or "").split("\n\n")),
-    }
+    output = {**_MARKET_BASE, "analysis": analysis, "context_used": n_docs}
     record_output(state, AgentName.MARKET, "market_output", output, "Market intelligence gathered")
     state.next_agent = _next_from_targets(state, AgentName.MARKET)
     return state
 
 def risk_node(state: TwinState, doc_store: DocumentStore) -> TwinState:
     q = state.question or ""
-    ctx = doc_store.query(f"risk assessment mitigation {q}")
+    ctx, n_docs = _query_context(doc_store, f"risk assessment mitigation {q}")
     analysis = enhance_with_llm(f"Risks and mitigation strategies for: {q}", ctx)
-    output = {
-        "risk_assessment": "Medium, mitigable",
-        "primary_risks": ["Regulatory changes", "Market volatility", "Delays"],
-        "mitigations": ["Proactive monitoring", "Diversified approach", "Agile PM"] ,
-        "analysis": analysis,
-        "context_used": len((ctx or "").split("\n\n")),
-    }
+    output = {**_RISK_BASE, "analysis": analysis, "context_used": n_docs}
     record_output(state, AgentName.RISK, "risk_output", output, "Risk analysis completed")
     state.next_agent = _next_from_targets(state, AgentName.RISK)
     return state
 
 def compliance_node(state: TwinState, doc_store: DocumentStore) -> TwinState:
     q = state.question or ""
-    ctx = doc_store.query(f"EU-GMP compliance Spain Canary Islands {q}")
+    ctx, n_docs = _query_context(doc_store, f"EU-GMP compliance Spain Canary Islands {q}")
     analysis = enhance_with_llm(f"Compliance and regulatory requirements for: {q}", ctx)
-    output = {
-        "regulatory_framework": "EU-GMP + Spanish requirements",
-        "timeline": "~6 months for certification",
-        "actions": ["SOPs update", "Internal audit", "Submission prep"],
-        "analysis": analysis,
-        "context_used": len((ctx or "").split("\n\n")),
-    }
+    output = {**_COMPLIANCE_BASE, "analysis": analysis, "context_used": n_docs}
     record_output(state, AgentName.COMPLIANCE, "compliance_output", output, "Compliance framework outlined")
     state.next_agent = _next_from_targets(state, AgentName.COMPLIANCE)
     return state
 
 def innovation_node(state: TwinState, doc_store: DocumentStore) -> TwinState:
     q = state.question or ""
-    ctx = doc_store.query(f"innovation technology digital transformation {q}")
+    ctx, n_docs = _query_context(doc_store, f"innovation technology digital transformation {q}")
     analysis = enhance_with_llm(f"Innovation opportunities and technology applications for: {q}", ctx)
-    output = {
-        "innovation_roadmap": "Technology-driven sustainability",
-        "initiatives": ["AI optimization", "Sustainable tech", "Digital acceleration"],
-        "analysis": analysis,
-        "context_used": len((ctx or "").split("\n\n")),
-    }
+    output = {**_INNOVATION_BASE, "analysis": analysis, "context_used": n_docs}
     record_output(state, AgentName.INNOVATION, "innovation_output", output, "Innovation roadmap prepared")
     state.next_agent = _next_from_targets(state, AgentName.INNOVATION)
     return state
 
+# Static part of the final answer; the summary lines are appended per query
+_FINAL_ANSWER_HEADER = "# Green Hill Canarias Digital Twin\n\nQuestion: {}\n\nSummary:\n- "
+
 def finalize_node(state: TwinState, doc_store: DocumentStore) -> TwinState:
     """Compose final answer from all agent outputs (dicts)."""
     q = state.question or "(no question)"
@@ -180,11 +218,7 @@ def finalize_node(state: TwinState, doc_store: DocumentStore) -> TwinState:
         f"💡 Innovation ({inn.get('context_used', 0)} ctx): roadmap with {len(inn.get('initiatives', []))} initiatives",
     ]
 
-    state.final_answer = (
-        f"# Green Hill Canarias Digital Twin\n\n"
-        f"Question: {q}\n\n"
-        f"Summary:\n- " + "\n- ".join(parts)
-    )
+    state.final_answer = _FINAL_ANSWER_HEADER.format(q) + "\n- ".join(parts)
     state.finalize = True
     state.history.append(Message(role="System", content="Final synthesis completed"))
     # Optional: archive outputs into vector store for future retrieval
@@ -227,11 +261,10 @@ def green_hill_node(state: TwinState, doc_store: DocumentStore) -> TwinState:
 
     content = None
     try:
-        from langchain_openai import ChatOpenAI
         from langchain_core.messages import HumanMessage, SystemMessage
 
         model = os.getenv("GREEN_HILL_CHAT_MODEL") or os.getenv("OPENAI_CHAT_MODEL", "gpt-4o")
-        llm = ChatOpenAI(model=model, temperature=0.2)
+        llm = _get_llm(model, 0.2)
         resp = llm.invoke([SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)])
         content = resp.content
     except Exception as e:
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import os
@@ -7,10 +8,16 @@ from typing import Any, Dict, List, Optional
 
 from app.ghc_twin import app as graph_app
 from app.models import TwinState
-from app.document_store import DocumentStore
+from app.document_store import get_document_store
+from app.checkpoints import thread_config
 
 
-api = FastAPI(title="Green Hill Canarias Digital Twin API")
+# Query results carry every agent output; orjson encodes them several
+# times faster than the stdlib encoder
+api = FastAPI(
+    title="Green Hill Canarias Digital Twin API",
+    default_response_class=ORJSONResponse,
+)
 
 api.add_middleware(
     CORSMiddleware,
@@ -52,7 +59,9 @@ def query(req: QueryRequest):
             priority=(req.priority or "normal"),
             timestamp=req.timestamp,
         )
-        result = graph_app.invoke(state)
+        # A fresh thread per request; keying on source_id would resume the
+        # previous question's thread and inherit its agent outputs
+        result = graph_app.invoke(state, thread_config())
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -65,7 +74,7 @@ def ingest_texts(req: IngestTextsRequest):
         or os.getenv("VECTOR_STORE_DIR")
         or "vector_store"
     )
-    store = DocumentStore(persist_dir)
+    store = get_document_store(persist_dir)
     ok = store.add_texts(texts=req.texts, metadatas=req.metadatas, ids=req.ids)
     if not ok:
         raise HTTPException(status_code=500, detail="Failed to add texts")
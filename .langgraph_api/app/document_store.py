@@ -1,29 +1,193 @@
 """Document store wrapper and ingestion helpers for the app namespace.
 
-Self-contained: no imports from root-level modules.
+Self-contained: no imports from root-level modules. LangChain, Chroma and
+embedding backends are imported inside the functions that use them so that
+importing this module stays cheap.
 """
+import logging
+import multiprocessing
 import os
+import threading
+import time
 import uuid
-from typing import List, Optional, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Hashable
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+logger = logging.getLogger(__name__)
+
+# Chunks per embedding/write call and concurrent calls during ingestion
+INGEST_BATCH_SIZE = 256
+INGEST_WORKERS = 8
+
+# Retrieval cache: entries per store and seconds before an entry expires
+QUERY_CACHE_SIZE = 512
+QUERY_CACHE_TTL = 300.0
+# Concurrent similarity searches per query_batch call
+QUERY_BATCH_WORKERS = 4
+# Seconds before a store whose Chroma load failed tries again
+STORE_RETRY_SECONDS = 30.0
+# Cosine similarity at which a new question reuses a cached question's
+# results; unset disables the semantic tier
+SEMANTIC_CACHE_TAU = os.getenv("SEMANTIC_CACHE_TAU")
+
+
+@lru_cache(maxsize=4)
+def get_embedder(model_name: str, backend: str = "hf"):
+    """Return a shared embeddings instance for ``(model_name, backend)``.
+
+    Loading a sentence-transformers model takes seconds, so instances are
+    cached per process. The cache is process-local: embedding models do not
+    pickle cleanly, so each worker process loads its own copy.
+    """
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=model_name)
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
 
 
 def _get_embeddings():
     backend = os.getenv("EMBEDDING_BACKEND", "hf").lower()
+    openai_model = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-large")
     if backend == "openai":
-        from langchain_openai import OpenAIEmbeddings
-        model = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-large")
-        return OpenAIEmbeddings(model=model)
+        return get_embedder(openai_model, "openai")
     # Default to HuggingFace
     try:
-        from langchain_huggingface import HuggingFaceEmbeddings
         model_name = os.getenv("HUGGINGFACE_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
-        return HuggingFaceEmbeddings(model_name=model_name)
+        return get_embedder(model_name)
     except Exception:
-        from langchain_openai import OpenAIEmbeddings
-        model = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-large")
-        return OpenAIEmbeddings(model=model)
+        return get_embedder(openai_model, "openai")
+
+
+def _cache_key(text: str, k: int) -> tuple[str, int]:
+    return (" ".join(text.lower().split()), k)
+
+
+_GENERATION_LOCK = threading.Lock()
+_store_generation = 0
+
+
+def store_generation() -> int:
+    """Return a counter bumped whenever a store's contents change in-process.
+
+    Caches of answers derived from retrieval (the orchestrator response
+    cache, the graph node cache) mix it into their keys, so entries from
+    before a write or re-ingest stop matching.
+    """
+    return _store_generation
+
+
+class QueryCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl_seconds``."""
+
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE, ttl_seconds: float = QUERY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SemanticCache:
+    """Reuses results of the most similar cached question above ``threshold``.
+
+    Unit-normalized question embeddings live in one preallocated matrix, so a
+    lookup is a single matrix-vector product. When full, the oldest entry is
+    overwritten. Like ``QueryCache``, entries expire after ``ttl_seconds``.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        max_size: int = QUERY_CACHE_SIZE,
+        ttl_seconds: float = QUERY_CACHE_TTL,
+    ):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._matrix = None
+        self._ks: List[int] = []
+        self._expires: List[float] = []
+        self._values: List[Any] = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector):
+        import numpy as np
+
+        v = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+    def get(self, vector, k: int) -> Optional[Any]:
+        import numpy as np
+
+        v = self._unit(vector)
+        with self._lock:
+            if self._values:
+                scores = self._matrix[: len(self._values)] @ v
+                scores[np.asarray(self._ks) != k] = -1.0
+                scores[np.asarray(self._expires) < time.monotonic()] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return self._values[best]
+            self.misses += 1
+            return None
+
+    def put(self, vector, k: int, value: Any) -> None:
+        import numpy as np
+
+        v = self._unit(vector)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_size, v.shape[0]), dtype=np.float32)
+            i = self._next
+            self._matrix[i] = v
+            expires = time.monotonic() + self.ttl_seconds
+            if i < len(self._values):
+                self._ks[i], self._expires[i], self._values[i] = k, expires, value
+            else:
+                self._ks.append(k)
+                self._expires.append(expires)
+                self._values.append(value)
+            self._next = (i + 1) % self.max_size
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._ks.clear()
+            self._expires.clear()
+            self._values.clear()
+            self._next = 0
 
 
 class DocumentStore:
@@ -47,6 +211,11 @@ class DocumentStore:
             or "vector_store"
         )
         self.vectordb = None
+        self._retry_after = 0.0
+        self._query_cache = QueryCache()
+        self._semantic_cache = (
+            SemanticCache(float(SEMANTIC_CACHE_TAU)) if SEMANTIC_CACHE_TAU else None
+        )
         self._try_load()
 
     def _try_load(self):
@@ -59,20 +228,94 @@ class DocumentStore:
                     embedding_function=embeddings,
                 )
         except Exception as e:
-            print(f"Vector store load failed: {e}")
+            logger.warning("Vector store load failed: %s", e)
             self.vectordb = None
+            self._retry_after = time.monotonic() + STORE_RETRY_SECONDS
 
     def is_available(self) -> bool:
+        """Whether the vector store is loaded, loading it if it appeared since.
+
+        A store created before its directory was ingested picks the index up
+        on the next call instead of staying empty for the process lifetime.
+        """
+        if (
+            self.vectordb is None
+            and time.monotonic() >= self._retry_after
+            and os.path.exists(self.persist_dir)
+        ):
+            self._try_load()
         return self.vectordb is not None
 
     def query(self, text: str, k: int = 5) -> str:
-        if not self.vectordb:
-            return "No vector store available"
+        return "\n\n".join(self.query_list(text, k=k))
+
+    def query_list(self, text: str, k: int = 5) -> List[str]:
+        """Like ``query`` but returns one entry per retrieved document.
+
+        Results are cached per normalized question and ``k``, so a repeated
+        question skips both the embedding call and the similarity search.
+        With ``SEMANTIC_CACHE_TAU`` set, a near-duplicate question reuses the
+        results of a cached one after a single embedding call. Writes through
+        this store clear both caches, except archived agent outputs.
+        """
+        if not self.is_available():
+            return ["No vector store available"]
+        key = _cache_key(text, k)
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            return list(cached)
         try:
-            docs = self.vectordb.similarity_search(text, k=k)
-            return "\n\n".join(d.page_content for d in docs)
+            if self._semantic_cache is None:
+                docs = self.vectordb.similarity_search(text, k=k)
+                contents = tuple(d.page_content for d in docs)
+            else:
+                vector = self.vectordb.embeddings.embed_query(text)
+                contents = self._search_by_vector(vector, k)
         except Exception as e:
-            return f"Vector store query failed: {e}"
+            return [f"Vector store query failed: {e}"]
+        self._query_cache.put(key, contents)
+        return list(contents)
+
+    def _search_by_vector(self, vector: List[float], k: int) -> tuple:
+        if self._semantic_cache is not None:
+            hit = self._semantic_cache.get(vector, k)
+            if hit is not None:
+                return hit
+        docs = self.vectordb.similarity_search_by_vector(vector, k=k)
+        contents = tuple(d.page_content for d in docs)
+        if self._semantic_cache is not None:
+            self._semantic_cache.put(vector, k, contents)
+        return contents
+
+    def query_batch(self, texts: List[str], k: int = 5) -> List[List[str]]:
+        """``query_list`` for many questions at once.
+
+        Uncached questions are embedded in a single provider call and their
+        searches run concurrently by vector, so N questions cost one
+        embedding round-trip instead of N.
+        """
+        if not self.is_available():
+            return [["No vector store available"] for _ in texts]
+        keys = [_cache_key(t, k) for t in texts]
+        results: List[Any] = [self._query_cache.get(key) for key in keys]
+        todo = [i for i, r in enumerate(results) if r is None]
+        if todo:
+            try:
+                vectors = self.vectordb.embeddings.embed_documents(
+                    [texts[i] for i in todo]
+                )
+                with ThreadPoolExecutor(max_workers=QUERY_BATCH_WORKERS) as pool:
+                    found = list(
+                        pool.map(lambda v: self._search_by_vector(v, k), vectors)
+                    )
+            except Exception as e:
+                for i in todo:
+                    results[i] = (f"Vector store query failed: {e}",)
+            else:
+                for i, contents in zip(todo, found):
+                    results[i] = contents
+                    self._query_cache.put(keys[i], contents)
+        return [list(r) for r in results]
 
     # --- Write APIs ---
     def _ensure_store(self):
@@ -88,7 +331,7 @@ class DocumentStore:
             )
             return self.vectordb
         except Exception as e:
-            print(f"Error creating vector store for upsert: {e}")
+            logger.warning("Error creating vector store for upsert: %s", e)
             return None
 
     def add_texts(
@@ -96,17 +339,29 @@ class DocumentStore:
         texts: List[str],
         metadatas: Optional[List[Dict[str, Any]]] = None,
         ids: Optional[List[str]] = None,
+        invalidate: bool = True,
     ) -> bool:
         store = self._ensure_store()
         if not store:
             return False
         try:
             store.add_texts(texts=texts, metadatas=metadatas, ids=ids)
+            if invalidate:
+                self.invalidate_caches()
             return True
         except Exception as e:
-            print(f"Error adding texts: {e}")
+            logger.warning("Error adding texts: %s", e)
             return False
 
+    def invalidate_caches(self) -> None:
+        """Drop cached query results after the underlying store changed."""
+        global _store_generation
+        with _GENERATION_LOCK:
+            _store_generation += 1
+        self._query_cache.invalidate()
+        if self._semantic_cache is not None:
+            self._semantic_cache.invalidate()
+
     def add_agent_outputs(self, state: Any) -> bool:
         items: List[tuple[str, Dict[str, Any]]] = []
 
@@ -151,6 +406,8 @@ class DocumentStore:
         if not items:
             return True
 
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
         splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
         texts: List[str] = []
         metas: List[Dict[str, Any]] = []
@@ -163,39 +420,71 @@ class DocumentStore:
                 metas.append({**meta, "chunk": i})
                 ids.append(f"agent:{base_id}:{i}")
 
-        return self.add_texts(texts, metas, ids)
+        # Archived answers are derived from retrieval, not new sources, so
+        # they leave cached results (and cached answers) in place
+        return self.add_texts(texts, metas, ids, invalidate=False)
+
+
+def _parse_pool(n_paths: int) -> ProcessPoolExecutor:
+    """Return a process pool for parsing ``n_paths`` source files.
+
+    PDF/XLSX parsing is CPU-bound Python, so it runs in worker processes
+    rather than threads. Workers are spawned, not forked, because the parent
+    may already hold embedding-model threads; spawned workers re-import
+    ``__main__``, so scripts must guard their entry point.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max(1, min(4, os.cpu_count() or 1, n_paths)),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def _load_path(p: str) -> List[Any]:
+    """Load one file with the loader matching its extension (runs in a worker)."""
+    from langchain_community.document_loaders import (
+        PyPDFLoader,
+        Docx2txtLoader,
+        UnstructuredExcelLoader,
+        TextLoader,
+    )
+
+    if not os.path.exists(p):
+        logger.warning("skip missing: %s", p)
+        return []
+    try:
+        if p.lower().endswith(".pdf"):
+            return PyPDFLoader(p).load()
+        elif p.lower().endswith(".docx"):
+            return Docx2txtLoader(p).load()
+        elif p.lower().endswith((".xlsx", ".xls")):
+            return UnstructuredExcelLoader(p).load()
+        elif p.lower().endswith(".txt"):
+            return TextLoader(p).load()
+    except Exception as e:
+        logger.warning("failed to load %s: %s", p, e)
+    return []
 
 
 def ingest_canonical_docs(doc_paths: List[str], persist_dir: str):
-    """Ingest explicit file paths into a Chroma vector store."""
+    """Ingest explicit file paths into a Chroma vector store.
+
+    Files are parsed in worker processes that live for this call only;
+    workers read each file from its path, so only paths and parsed Documents
+    cross the process boundary. Chunks are then embedded in batches of
+    ``INGEST_BATCH_SIZE`` on ``INGEST_WORKERS`` threads so embedding
+    round-trips overlap. Writes stay on the calling thread: the Chroma
+    handle is not safe for concurrent writers.
+    """
     try:
-        from langchain_community.document_loaders import (
-            PyPDFLoader,
-            Docx2txtLoader,
-            UnstructuredExcelLoader,
-            TextLoader,
-        )
+        import langchain_community.document_loaders  # noqa: F401
         from langchain_chroma import Chroma
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
     except Exception as e:
         print(f"Missing ingestion deps: {e}")
         return None
 
-    docs = []
-    for p in doc_paths:
-        if not os.path.exists(p):
-            print(f"skip missing: {p}")
-            continue
-        try:
-            if p.lower().endswith(".pdf"):
-                docs.extend(PyPDFLoader(p).load())
-            elif p.lower().endswith(".docx"):
-                docs.extend(Docx2txtLoader(p).load())
-            elif p.lower().endswith((".xlsx", ".xls")):
-                docs.extend(UnstructuredExcelLoader(p).load())
-            elif p.lower().endswith(".txt"):
-                docs.extend(TextLoader(p).load())
-        except Exception as e:
-            print(f"failed to load {p}: {e}")
+    with _parse_pool(len(doc_paths)) as pool:
+        docs = [d for loaded in pool.map(_load_path, doc_paths) for d in loaded]
 
     if not docs:
         print("no documents loaded")
@@ -206,7 +495,28 @@ def ingest_canonical_docs(doc_paths: List[str], persist_dir: str):
     embeddings = _get_embeddings()
     os.makedirs(persist_dir, exist_ok=True)
     try:
-        db = Chroma.from_documents(chunks, embeddings, persist_directory=persist_dir)
+        db = Chroma(persist_directory=persist_dir, embedding_function=embeddings)
+        texts = [c.page_content for c in chunks]
+        metadatas = [c.metadata for c in chunks]
+        starts = range(0, len(chunks), INGEST_BATCH_SIZE)
+        with ThreadPoolExecutor(max_workers=INGEST_WORKERS) as pool:
+            vectors = pool.map(
+                lambda i: embeddings.embed_documents(texts[i : i + INGEST_BATCH_SIZE]),
+                starts,
+            )
+            # map yields in order, so each batch is written as soon as its
+            # embeddings are ready while later batches are still embedding
+            for i, batch_vectors in zip(starts, vectors):
+                end = i + INGEST_BATCH_SIZE
+                db._collection.add(
+                    ids=[str(uuid.uuid4()) for _ in texts[i:end]],
+                    embeddings=batch_vectors,
+                    documents=texts[i:end],
+                    metadatas=metadatas[i:end],
+                )
+        # The process-wide store for this directory may hold results from
+        # before the re-ingest
+        refresh_document_store(persist_dir)
         print(f"persisted {len(chunks)} chunks -> {persist_dir}")
         return db
     except Exception as e:
@@ -214,8 +524,35 @@ def ingest_canonical_docs(doc_paths: List[str], persist_dir: str):
         return None
 
 
+_STORE_LOCK = threading.Lock()
+_STORES: Dict[str, DocumentStore] = {}
+
+
 def get_document_store(persist_dir: str) -> Optional[DocumentStore]:
-    return DocumentStore(persist_dir)
+    """Return the process-wide DocumentStore for ``persist_dir``.
+
+    Like ``get_embedder`` this is a per-process singleton; it is not shared
+    across multiprocessing workers. The lock makes concurrent cold starts
+    load the Chroma index once instead of once per thread.
+    """
+    with _STORE_LOCK:
+        store = _STORES.get(persist_dir)
+        if store is None:
+            store = _STORES[persist_dir] = DocumentStore(persist_dir)
+        return store
+
+
+def refresh_document_store(persist_dir: str) -> None:
+    """Drop cached results of the live store for ``persist_dir``, if any.
+
+    Called after an ingest writes to the directory through its own Chroma
+    handle. A store that was never created is left alone rather than
+    loaded just to be invalidated.
+    """
+    with _STORE_LOCK:
+        store = _STORES.get(persist_dir)
+    if store is not None:
+        store.invalidate_caches()
 
 
 def bootstrap_store(persist_dir: str):
@@ -1,9 +1,11 @@
 # app/ghc_twin.py
 import os
-from typing import List
+from typing import Any, Dict, List, Tuple, Union
 from langgraph.graph import StateGraph, START, END
-from app.models import TwinState, AgentName, Message
+from langgraph.types import Send
+from app.models import TwinState, AgentName, Message, FanOutState
 from app.document_store import get_document_store
+from app.checkpoints import get_checkpointer, get_node_cache, thread_config
 from app.agents import (
     strategy_node,
     finance_node,
@@ -17,37 +19,66 @@ from app.agents import (
 )
 
 
+_INVESTOR_AGENTS = (
+    AgentName.STRATEGY,
+    AgentName.FINANCE,
+    AgentName.MARKET,
+    AgentName.RISK,
+    AgentName.GREEN_HILL,
+)
+_SUPPLIER_AGENTS = (AgentName.OPERATIONS, AgentName.COMPLIANCE)
+
+# source_type -> agents, resolved with one dict lookup per request
+_AGENTS_BY_SOURCE_TYPE: Dict[str, Tuple[AgentName, ...]] = {
+    "master": (
+        AgentName.STRATEGY,
+        AgentName.FINANCE,
+        AgentName.OPERATIONS,
+        AgentName.MARKET,
+        AgentName.RISK,
+        AgentName.COMPLIANCE,
+        AgentName.INNOVATION,
+        AgentName.GREEN_HILL,
+    ),
+    "shareholder": _INVESTOR_AGENTS,
+    "investor": _INVESTOR_AGENTS,
+    "supplier": _SUPPLIER_AGENTS,
+    "provider": _SUPPLIER_AGENTS,
+    "public": (AgentName.MARKET, AgentName.STRATEGY),
+    "ocs_feed": (AgentName.OPERATIONS, AgentName.COMPLIANCE),
+    "web_source": (AgentName.MARKET, AgentName.RISK),
+}
+
+
 def classify_request(state: TwinState) -> List[AgentName]:
-    # Simple role-based classification; extend with keywords as needed
+    # Simple role-based classification; extend _AGENTS_BY_SOURCE_TYPE as needed
     st = (state.source_type or "public").lower()
-    if st == "master":
-        return [
-            AgentName.STRATEGY,
-            AgentName.FINANCE,
-            AgentName.OPERATIONS,
-            AgentName.MARKET,
-            AgentName.RISK,
-            AgentName.COMPLIANCE,
-            AgentName.INNOVATION,
-            AgentName.GREEN_HILL,
-        ]
-    if st in {"shareholder", "investor"}:
-        return [
-            AgentName.STRATEGY,
-            AgentName.FINANCE,
-            AgentName.MARKET,
-            AgentName.RISK,
-            AgentName.GREEN_HILL,
-        ]
-    if st in {"supplier", "provider"}:
-        return [AgentName.OPERATIONS, AgentName.COMPLIANCE]
-    if st == "public":
-        return [AgentName.MARKET, AgentName.STRATEGY]
-    if st == "ocs_feed":
-        return [AgentName.OPERATIONS, AgentName.COMPLIANCE]
-    if st == "web_source":
-        return [AgentName.MARKET, AgentName.RISK]
-    return []
+    return list(_AGENTS_BY_SOURCE_TYPE.get(st, ()))
+
+
+def _persist_dir() -> str:
+    # Read per call: the Streamlit tester sets VECTORSTORE_DIR after import.
+    # The store handle itself is cached per directory by get_document_store.
+    return (
+        os.getenv("VECTORSTORE_DIR")
+        or os.getenv("VECTOR_STORE_DIR")
+        or "vector_store"
+    )
+
+
+def _retrieve_context(persist_dir: str, question: str, k: int = 5) -> List[str]:
+    # DocumentStore.query_list caches per question and drops the cache on
+    # writes, so repeated questions skip the embedding and ANN search.
+    store = get_document_store(persist_dir)
+    if not (store and store.is_available()):
+        return ["No vector store available"]
+    return store.query_list(question, k=k)
+
+
+def _needs_retrieval(state: TwinState) -> bool:
+    # Routing fields don't matter: intake presets target_agents for
+    # web_source/ocs_feed and those still need context
+    return not state.context.get("retrieved_docs")
 
 
 def digital_twin(state: TwinState) -> TwinState:
@@ -59,23 +90,18 @@ def digital_twin(state: TwinState) -> TwinState:
         )
         return state
 
-    # Load vector store and attach context
-    persist_dir = (
-        os.getenv("VECTORSTORE_DIR")
-        or os.getenv("VECTOR_STORE_DIR")
-        or "vector_store"
-    )
-    store = get_document_store(persist_dir)
-    if store and store.is_available():
-        ctx = store.query(state.question, k=5)
-        state.context["retrieved_docs"] = ctx.split("\n\n") if ctx else []
-    else:
-        state.context["retrieved_docs"] = ["No vector store available"]
-
-    # Classify
     # Allow direct mode via target_agent/target_agents
     if state.target_agent and state.target_agent not in state.target_agents:
         state.target_agents.append(state.target_agent)
+
+    # Load vector store and attach context unless the caller (or run_batch)
+    # already attached it
+    if _needs_retrieval(state):
+        state.context["retrieved_docs"] = _retrieve_context(
+            _persist_dir(), state.question
+        )
+
+    # Classify
     targets = state.target_agents or classify_request(state)
     state.target_agents = targets
     if not targets:
@@ -115,89 +141,179 @@ def intake_node(state: TwinState) -> TwinState:
     return st
 
 
-def router(state):
-    # Accept both dict and TwinState
-    st = state if isinstance(state, TwinState) else TwinState(**state)
+# Agent -> graph node name, built once at import instead of on every hop
+_ROUTE_BY_AGENT: Dict[AgentName, str] = {
+    agent: agent.value
+    for agent in (
+        AgentName.STRATEGY,
+        AgentName.FINANCE,
+        AgentName.OPERATIONS,
+        AgentName.MARKET,
+        AgentName.RISK,
+        AgentName.COMPLIANCE,
+        AgentName.INNOVATION,
+        AgentName.GREEN_HILL,
+    )
+}
+
+# Agent -> node function; node names come from _ROUTE_BY_AGENT
+_AGENT_NODE_FUNCS = {
+    AgentName.STRATEGY: strategy_node,
+    AgentName.FINANCE: finance_node,
+    AgentName.OPERATIONS: operations_node,
+    AgentName.MARKET: market_node,
+    AgentName.RISK: risk_node,
+    AgentName.COMPLIANCE: compliance_node,
+    AgentName.INNOVATION: innovation_node,
+    AgentName.GREEN_HILL: green_hill_node,
+}
+
+# Specialist agent -> TwinState field its node writes. Specialists only read
+# the question and context, so the graph runs the selected ones in parallel.
+_OUTPUT_FIELD_BY_AGENT: Dict[AgentName, str] = {
+    AgentName.STRATEGY: "strategy_output",
+    AgentName.FINANCE: "finance_output",
+    AgentName.OPERATIONS: "operations_output",
+    AgentName.MARKET: "market_output",
+    AgentName.RISK: "risk_output",
+    AgentName.COMPLIANCE: "compliance_output",
+    AgentName.INNOVATION: "innovation_output",
+}
+
+_GREEN_HILL = _ROUTE_BY_AGENT[AgentName.GREEN_HILL]
+
+
+def _as_state(state: Union[TwinState, Dict[str, Any]]) -> TwinState:
+    # Graph state is trusted, so dicts are rebuilt without re-validation
+    return state if isinstance(state, TwinState) else TwinState.model_construct(**state)
+
+
+def router(state: Union[TwinState, Dict[str, Any]]) -> str:
+    """Sequential next_agent routing, for callers that step agents one by one."""
+    st = _as_state(state)
     if st.finalize:
         return END
-    m = {
-        AgentName.STRATEGY: AgentName.STRATEGY.value,
-        AgentName.FINANCE: AgentName.FINANCE.value,
-        AgentName.OPERATIONS: AgentName.OPERATIONS.value,
-        AgentName.MARKET: AgentName.MARKET.value,
-        AgentName.RISK: AgentName.RISK.value,
-        AgentName.COMPLIANCE: AgentName.COMPLIANCE.value,
-        AgentName.INNOVATION: AgentName.INNOVATION.value,
-        AgentName.GREEN_HILL: AgentName.GREEN_HILL.value,
-    }
     # If no explicit next agent but not finalized, go to finalize node
-    if st.next_agent is None and not st.finalize:
+    if st.next_agent is None:
         return "finalize"
-    return m.get(st.next_agent, END)
+    return _ROUTE_BY_AGENT.get(st.next_agent, END)
+
+
+def after_specialists(state: Union[TwinState, Dict[str, Any]]) -> str:
+    # GreenHillGPT merges every specialist output, so it runs after them
+    st = _as_state(state)
+    return _GREEN_HILL if AgentName.GREEN_HILL in st.target_agents else "finalize"
+
+
+def _at_fan_in(node_fn):
+    """Run ``node_fn`` on the state the sequential chain used to end with.
+
+    Parallel specialists only write their output field, so at fan-in the
+    last targeted specialist becomes ``current_agent`` and ``next_agent`` is
+    cleared, as if they had run one after another.
+    """
+    def _wrapped(state: TwinState, *args):
+        specialists = [a for a in state.target_agents if a in _OUTPUT_FIELD_BY_AGENT]
+        state = state.model_copy(update={
+            "current_agent": specialists[-1] if specialists else state.current_agent,
+            "next_agent": None,
+        })
+        return node_fn(state, *args)
+    return _wrapped
+
+
+def dispatch(state: Union[TwinState, Dict[str, Any]]) -> Union[str, List[Send]]:
+    """Fan the selected specialists out so they run in a single superstep."""
+    st = _as_state(state)
+    if st.finalize:
+        return END
+    specialists = [
+        _ROUTE_BY_AGENT[agent]
+        for agent in dict.fromkeys(st.target_agents)
+        if agent in _OUTPUT_FIELD_BY_AGENT
+    ]
+    if specialists:
+        return [Send(node, st) for node in specialists]
+    return after_specialists(st)
 
 
 def build_graph():
-    g = StateGraph(TwinState)
+    g = StateGraph(FanOutState)
     # Initialize a single document store instance
-    persist_dir = (
-        os.getenv("VECTORSTORE_DIR")
-        or os.getenv("VECTOR_STORE_DIR")
-        or "vector_store"
-    )
-    store = get_document_store(persist_dir)
-    # Wrappers to convert dict<->TwinState for nodes
-    def wrap(node_fn):
+    store = get_document_store(_persist_dir())
+    # Opt-in via GHC_NODE_CACHE_TTL: specialist results are reused for a
+    # repeated question
+    node_cache, specialist_policy = get_node_cache()
+    # Nodes run on a copy with empty history and return only what they
+    # appended; the history reducer concatenates it onto the graph state.
+    def wrap(node_fn, *args):
         def _wrapped(s):
-            st = s if isinstance(s, TwinState) else TwinState(**s)
-            out = node_fn(st)
-            return out.model_dump() if isinstance(out, TwinState) else out
+            st = _as_state(s).model_copy(update={"history": []})
+            out = node_fn(st, *args)
+            if not isinstance(out, TwinState):
+                return out
+            update = out.model_dump(exclude={"history"})
+            update["history"] = out.history
+            return update
         return _wrapped
-    def wrap_with_store(node_fn):
+    # Specialists run concurrently, so each writes only its own output field
+    def wrap_specialist(node_fn, field):
         def _wrapped(s):
-            st = s if isinstance(s, TwinState) else TwinState(**s)
+            st = _as_state(s).model_copy(update={"history": []})
             out = node_fn(st, store)
-            return out.model_dump() if isinstance(out, TwinState) else out
+            return {field: getattr(out, field), "history": out.history}
         return _wrapped
     # Nodes
     g.add_node("intake", wrap(intake_node))
     g.add_node("digital_twin", wrap(digital_twin))
-    g.add_node(AgentName.STRATEGY.value, wrap_with_store(strategy_node))
-    g.add_node(AgentName.FINANCE.value, wrap_with_store(finance_node))
-    g.add_node(AgentName.OPERATIONS.value, wrap_with_store(operations_node))
-    g.add_node(AgentName.MARKET.value, wrap_with_store(market_node))
-    g.add_node(AgentName.RISK.value, wrap_with_store(risk_node))
-    g.add_node(AgentName.COMPLIANCE.value, wrap_with_store(compliance_node))
-    g.add_node(AgentName.INNOVATION.value, wrap_with_store(innovation_node))
-    g.add_node(AgentName.GREEN_HILL.value, wrap_with_store(green_hill_node))
-    g.add_node("finalize", wrap_with_store(finalize_node))
-
-    # Edges
+    for agent, field in _OUTPUT_FIELD_BY_AGENT.items():
+        g.add_node(
+            _ROUTE_BY_AGENT[agent],
+            wrap_specialist(_AGENT_NODE_FUNCS[agent], field),
+            cache_policy=specialist_policy,
+        )
+    g.add_node(_GREEN_HILL, wrap(_at_fan_in(green_hill_node), store))
+    g.add_node("finalize", wrap(_at_fan_in(finalize_node), store))
+
+    # Edges: fan out to the selected specialists, fan in at GreenHillGPT
+    # (when selected) or finalize
+    fan_in = {_GREEN_HILL: _GREEN_HILL, "finalize": "finalize"}
     g.add_edge(START, "intake")
     g.add_edge("intake", "digital_twin")
-    route_map = {
-        AgentName.STRATEGY.value: AgentName.STRATEGY.value,
-        AgentName.FINANCE.value: AgentName.FINANCE.value,
-        AgentName.OPERATIONS.value: AgentName.OPERATIONS.value,
-        AgentName.MARKET.value: AgentName.MARKET.value,
-        AgentName.RISK.value: AgentName.RISK.value,
-        AgentName.COMPLIANCE.value: AgentName.COMPLIANCE.value,
-        AgentName.INNOVATION.value: AgentName.INNOVATION.value,
-        AgentName.GREEN_HILL.value: AgentName.GREEN_HILL.value,
-        "finalize": "finalize",
-        END: END,
-    }
-    g.add_conditional_edges("digital_twin", router, route_map)
-    for agent in [
-        AgentName.STRATEGY,
-        AgentName.FINANCE,
-        AgentName.OPERATIONS,
-        AgentName.MARKET,
-        AgentName.RISK,
-        AgentName.COMPLIANCE,
-        AgentName.INNOVATION,
-        AgentName.GREEN_HILL,
-    ]:
-        g.add_conditional_edges(agent.value, router, route_map)
+    g.add_conditional_edges(
+        "digital_twin",
+        dispatch,
+        [*(_ROUTE_BY_AGENT[a] for a in _OUTPUT_FIELD_BY_AGENT), *fan_in, END],
+    )
+    for agent in _OUTPUT_FIELD_BY_AGENT:
+        g.add_conditional_edges(_ROUTE_BY_AGENT[agent], after_specialists, fan_in)
+    g.add_edge(_GREEN_HILL, END)
+    g.add_edge("finalize", END)
 
-    return g.compile()
+    # Opt-in via GHC_CHECKPOINT_DB; invocations then need a thread_id
+    return g.compile(checkpointer=get_checkpointer(), cache=node_cache)
 app = build_graph()
+
+
+def run_batch(states: List[TwinState], config: Any = None) -> List[Dict[str, Any]]:
+    """Invoke the graph for many requests with retrieval batched up front.
+
+    Context for every state that needs it is fetched with one
+    ``DocumentStore.query_batch`` call and attached before ``app.batch``, so
+    digital_twin finds it already present. The caller's states are not
+    modified.
+    """
+    pending = [i for i, s in enumerate(states) if s.question and _needs_retrieval(s)]
+    store = get_document_store(_persist_dir()) if pending else None
+    if store and store.is_available():
+        states = list(states)
+        docs = store.query_batch([states[i].question for i in pending])
+        for i, retrieved in zip(pending, docs):
+            context = {**states[i].context, "retrieved_docs": retrieved}
+            states[i] = states[i].model_copy(update={"context": context})
+    # Each state runs on its own thread when GHC_CHECKPOINT_DB is set
+    if isinstance(config, list):
+        configs = [thread_config(c) for c in config]
+    else:
+        configs = [thread_config(config) for _ in states]
+    return app.batch(states, configs)
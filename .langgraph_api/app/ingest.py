@@ -1,10 +1,28 @@
 # app/ingest.py
 import os
 import glob
-from typing import List, Optional
+from typing import Iterator, List, Optional
+
+# Chunks embedded and written per Chroma call; bounds peak memory
+INGEST_BATCH_SIZE = 512
+
+
+def _iter_chunks(loaders, splitter) -> Iterator:
+    """Yield split chunks one source document at a time."""
+    for loader in loaders:
+        try:
+            for doc in loader.lazy_load():
+                yield from splitter.split_documents([doc])
+        except Exception as e:
+            print(f"Failed to process {loader}: {e}")
+
 
 def ingest_docs(source_dir: str, persist_dir: str, embed_model: str = None):
-    """Ingest documents from source directory into vector store"""
+    """Ingest documents from source directory into vector store.
+
+    Documents are loaded, split and embedded in batches of
+    ``INGEST_BATCH_SIZE`` chunks, so the whole corpus is never held in RAM.
+    """
     
     try:
         # Import dependencies
@@ -13,7 +31,7 @@ def ingest_docs(source_dir: str, persist_dir: str, embed_model: str = None):
         )
         from langchain.text_splitter import RecursiveCharacterTextSplitter
         from langchain_chroma import Chroma
-        from langchain_huggingface import HuggingFaceEmbeddings
+        from app.document_store import get_embedder, refresh_document_store
         
     except ImportError as e:
         print(f"Missing dependencies for ingestion: {e}")
@@ -41,42 +59,42 @@ def ingest_docs(source_dir: str, persist_dir: str, embed_model: str = None):
         print(f"No supported documents found in {source_dir}")
         return False
     
-    # Load and split documents
-    docs = []
-    for loader in loaders:
-        try:
-            docs.extend(loader.load())
-        except Exception as e:
-            print(f"Failed to process {loader}: {e}")
-    
-    if not docs:
-        print("No documents successfully loaded")
-        return False
-    
     # Split into chunks
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000, 
         chunk_overlap=200,
         separators=["\n\n", "\n", ". ", " ", ""]
     )
-    texts = splitter.split_documents(docs)
-    print(f"Split into {len(texts)} chunks")
     
     # Create embeddings and vector store
     model_name = embed_model or "sentence-transformers/all-MiniLM-L6-v2"
-    embed_func = HuggingFaceEmbeddings(model_name=model_name)
+    embed_func = get_embedder(model_name)
     
     # Create persist directory
     os.makedirs(persist_dir, exist_ok=True)
     
-    # Build vector store
-    db = Chroma.from_documents(
-        texts, 
-        embed_func, 
-        persist_directory=persist_dir
-    )
+    # Stream chunks into the vector store batch by batch
+    db = Chroma(persist_directory=persist_dir, embedding_function=embed_func)
+    total = 0
+    batch = []
+    for chunk in _iter_chunks(loaders, splitter):
+        batch.append(chunk)
+        if len(batch) >= INGEST_BATCH_SIZE:
+            db.add_documents(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.add_documents(batch)
+        total += len(batch)
+    
+    if not total:
+        print("No documents successfully loaded")
+        return False
+    
+    # Drop query results cached from before the re-ingest
+    refresh_document_store(persist_dir)
     
-    print(f"✅ Ingested {len(texts)} chunks into {persist_dir}")
+    print(f"✅ Ingested {total} chunks into {persist_dir}")
     print(f"Vector store ready for deployment")
     
     return True
@@ -1,134 +1,112 @@
 # app/main.py
-from langgraph.graph import StateGraph, END
-from app.models import TwinState, AgentName
+from pydantic import TypeAdapter
+from app.models import TwinState, AgentName, Message, FanOutState
 from app.agents import (
     strategy_node, operations_node, finance_node, market_intel_node,
     risk_node, compliance_node, innovation_node, finalize_node
 )
-from app.document_store import DocumentStore
-from typing import Dict, Callable, Any
+from app.document_store import DocumentStore, get_document_store
+from app.checkpoints import get_checkpointer, thread_config
+from typing import TYPE_CHECKING, Dict, Callable, Any, List, Optional, Tuple
 import os
+import threading
+from functools import lru_cache
 
-def create_agent_wrapper(agent_func: Callable, doc_store: DocumentStore):
-    """Wrap agent functions to inject document store"""
-    def wrapper(state: TwinState) -> TwinState:
-        return agent_func(state, doc_store)
+# LangGraph costs ~0.5 s to import; simple mode never builds a graph, so it
+# is imported where the graph is built
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
+
+
+# Serializes conversation history in one pydantic-core call
+_HISTORY_ADAPTER = TypeAdapter(List[Message])
+
+# Agent node name -> (agent function, TwinState field it writes)
+AGENT_NODES: Dict[str, Tuple[Callable, str]] = {
+    AgentName.STRATEGY.value: (strategy_node, "strategy_output"),
+    AgentName.OPERATIONS.value: (operations_node, "operations_output"),
+    AgentName.FINANCE.value: (finance_node, "finance_output"),
+    AgentName.MARKET_INTEL.value: (market_intel_node, "market_output"),
+    AgentName.RISK.value: (risk_node, "risk_output"),
+    AgentName.COMPLIANCE.value: (compliance_node, "compliance_output"),
+    AgentName.INNOVATION.value: (innovation_node, "innovation_output"),
+}
+
+def create_agent_wrapper(agent_func: Callable, doc_store: DocumentStore, *keys: str):
+    """Wrap agent functions to inject document store.
+
+    The agent runs on a scratch copy of the state and the wrapper returns
+    only ``keys`` plus the history entries the agent appended, so agents
+    running in parallel never write the same channel.
+    """
+    def wrapper(state: TwinState) -> Dict[str, Any]:
+        scratch = state.model_copy(update={"history": []})
+        out = agent_func(scratch, doc_store)
+        update = {key: getattr(out, key) for key in keys}
+        update["history"] = out.history
+        return update
     return wrapper
 
-def router_logic(state: TwinState) -> str:
-    """Route to next agent or finalize"""
-    if state.finalize:
-        return END
-    
-    if state.next_agent is None:
-        return "finalize"
-    
-    return state.next_agent.value
+def dispatch_agents(state: TwinState) -> list:
+    """Fan the state out to every agent so they run in a single superstep.
+
+    Returns ``Send`` packets; the annotation stays plain because LangGraph
+    resolves it at runtime and Send is imported lazily.
+    """
+    from langgraph.types import Send
+
+    return [Send(name, state) for name in AGENT_NODES]
 
-def create_app() -> StateGraph:
+def create_app() -> "StateGraph":
     """Create the Green Hill Digital Twin LangGraph application"""
+    from langgraph.graph import StateGraph, START, END
     
-    # Initialize document store
-    doc_store = DocumentStore()
+    # Reuse the process-wide document store
+    doc_store = get_document_store(
+        os.getenv("VECTORSTORE_DIR")
+        or os.getenv("VECTOR_STORE_DIR")
+        or "vector_store"
+    )
     
     # Create the state graph
-    workflow = StateGraph(TwinState)
+    workflow = StateGraph(FanOutState)
     
     # Add all agent nodes with document store injection
-    workflow.add_node(AgentName.STRATEGY.value, create_agent_wrapper(strategy_node, doc_store))
-    workflow.add_node(AgentName.OPERATIONS.value, create_agent_wrapper(operations_node, doc_store))
-    workflow.add_node(AgentName.FINANCE.value, create_agent_wrapper(finance_node, doc_store))
-    workflow.add_node(AgentName.MARKET_INTEL.value, create_agent_wrapper(market_intel_node, doc_store))
-    workflow.add_node(AgentName.RISK.value, create_agent_wrapper(risk_node, doc_store))
-    workflow.add_node(AgentName.COMPLIANCE.value, create_agent_wrapper(compliance_node, doc_store))
-    workflow.add_node(AgentName.INNOVATION.value, create_agent_wrapper(innovation_node, doc_store))
-    workflow.add_node("finalize", create_agent_wrapper(finalize_node, doc_store))
-    
-    # Set entry point
-    workflow.set_entry_point(AgentName.STRATEGY.value)
-    
-    # Add edges with routing logic
-    workflow.add_conditional_edges(
-        AgentName.STRATEGY.value,
-        router_logic,
-        {
-            AgentName.OPERATIONS.value: AgentName.OPERATIONS.value,
-            "finalize": "finalize",
-            END: END
-        }
-    )
-    
-    workflow.add_conditional_edges(
-        AgentName.OPERATIONS.value,
-        router_logic,
-        {
-            AgentName.FINANCE.value: AgentName.FINANCE.value,
-            "finalize": "finalize",
-            END: END
-        }
-    )
-    
-    workflow.add_conditional_edges(
-        AgentName.FINANCE.value,
-        router_logic,
-        {
-            AgentName.MARKET_INTEL.value: AgentName.MARKET_INTEL.value,
-            "finalize": "finalize",
-            END: END
-        }
-    )
-    
-    workflow.add_conditional_edges(
-        AgentName.MARKET_INTEL.value,
-        router_logic,
-        {
-            AgentName.RISK.value: AgentName.RISK.value,
-            "finalize": "finalize",
-            END: END
-        }
-    )
-    
-    workflow.add_conditional_edges(
-        AgentName.RISK.value,
-        router_logic,
-        {
-            AgentName.COMPLIANCE.value: AgentName.COMPLIANCE.value,
-            "finalize": "finalize",
-            END: END
-        }
-    )
-    
-    workflow.add_conditional_edges(
-        AgentName.COMPLIANCE.value,
-        router_logic,
-        {
-            AgentName.INNOVATION.value: AgentName.INNOVATION.value,
-            "finalize": "finalize",
-            END: END
-        }
-    )
-    
-    workflow.add_conditional_edges(
-        AgentName.INNOVATION.value,
-        router_logic,
-        {
-            "finalize": "finalize",
-            END: END
-        }
+    for name, (agent_func, output_key) in AGENT_NODES.items():
+        workflow.add_node(name, create_agent_wrapper(agent_func, doc_store, output_key))
+    workflow.add_node(
+        "finalize",
+        create_agent_wrapper(finalize_node, doc_store, "final_answer", "finalize"),
     )
     
+    # Fan out to every agent in parallel, then fan in at finalize
+    workflow.add_conditional_edges(START, dispatch_agents, list(AGENT_NODES))
+    for name in AGENT_NODES:
+        workflow.add_edge(name, "finalize")
     workflow.add_edge("finalize", END)
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=get_checkpointer())
 
-# Create the main application
-app = create_app()
+# The compiled graph is built on first use so simple mode never pays for it
+_app = None
+_APP_LOCK = threading.Lock()
 
-def simple_mode_handler(question: str) -> Dict[str, Any]:
-    """Handle simple mode queries with basic response"""
-    return {
-        "question": question,
-        "answer": f"""# Green Hill Canarias - Strategic Response
+def get_app():
+    """Return the process-wide compiled graph, building it once."""
+    global _app
+    if _app is None:
+        with _APP_LOCK:
+            if _app is None:
+                _app = create_app()
+    return _app
+
+def __getattr__(name: str):
+    # Materialize ``app`` lazily while keeping ``from app.main import app``
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_SIMPLE_TEMPLATE = """# Green Hill Canarias - Strategic Response
 
 **Question:** {question}
 
@@ -145,10 +123,27 @@ def simple_mode_handler(question: str) -> Dict[str, Any]:
 
 ---
 *Response from Green Hill Canarias Simple Mode*"""
+
+# Split once at import so answers are a plain concatenation
+_SIMPLE_PREFIX, _SIMPLE_SUFFIX = _SIMPLE_TEMPLATE.split("{question}")
+
+@lru_cache(maxsize=1024)
+def _simple_answer(question: str) -> str:
+    return _SIMPLE_PREFIX + str(question) + _SIMPLE_SUFFIX
+
+def simple_mode_handler(question: str) -> Dict[str, Any]:
+    """Handle simple mode queries with basic response"""
+    return {
+        "question": question,
+        "answer": _simple_answer(question),
     }
 
-def run_query(question: str) -> Dict[str, Any]:
-    """Main entry point for processing queries"""
+def run_query(question: str, thread_id: Optional[str] = None) -> Dict[str, Any]:
+    """Main entry point for processing queries.
+
+    ``thread_id`` resumes a checkpointed conversation when GHC_CHECKPOINT_DB
+    is set; by default each query gets a fresh thread.
+    """
     
     deployment_mode = os.getenv("DEPLOYMENT_MODE", "simple")
     
@@ -157,8 +152,9 @@ def run_query(question: str) -> Dict[str, Any]:
     
     elif deployment_mode == "multi_agent":
         # Run the full multi-agent workflow
-        initial_state = TwinState(question=question)
-        result = app.invoke(initial_state)
+        initial_state = TwinState.model_construct(question=question)
+        config = thread_config({"configurable": {"thread_id": thread_id}} if thread_id else None)
+        result = get_app().invoke(initial_state, config)
         
         return {
             "question": question,
@@ -172,11 +168,11 @@ def run_query(question: str) -> Dict[str, Any]:
                 "compliance": result.get("compliance_output"),
                 "innovation": result.get("innovation_output")
             },
-            "conversation_history": [msg.dict() for msg in result["history"]]
+            "conversation_history": _HISTORY_ADAPTER.dump_python(result["history"])
         }
     
     else:
         raise ValueError(f"Unknown deployment mode: {deployment_mode}")
 
 # Export for LangGraph Cloud
-__all__ = ["app", "run_query"]
+__all__ = ["app", "get_app", "run_query"]
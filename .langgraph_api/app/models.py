@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import Any, Dict, List, Optional, Literal
+from typing import Annotated, Any, Dict, List, Optional, Literal
 from pydantic import BaseModel, Field
 
 
@@ -73,3 +73,20 @@ class TwinState(BaseModel):
     class Config:
         extra = "allow"
         arbitrary_types_allowed = True
+
+
+# Most recent history entries kept in graph state. Checkpointed threads
+# otherwise grow by one message per node on every turn.
+HISTORY_LIMIT = 256
+
+
+def append_history(left: List[Message], right: List[Message]) -> List[Message]:
+    """History reducer: concatenate, keeping the last ``HISTORY_LIMIT`` entries."""
+    merged = left + right
+    return merged[-HISTORY_LIMIT:] if len(merged) > HISTORY_LIMIT else merged
+
+
+class FanOutState(TwinState):
+    """TwinState whose history concatenates appends from parallel agents."""
+
+    history: Annotated[List[Message], append_history] = Field(default_factory=list)
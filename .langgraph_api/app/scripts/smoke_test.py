@@ -9,13 +9,14 @@ def main() -> None:
     os.environ.pop("OPENAI_API_KEY", None)
 
     from app.ghc_twin import app
+    from app.checkpoints import thread_config
 
     state = {
         "question": "What are the investor priorities for Green Hill Canarias?",
         "source_type": "investor",
     }
 
-    res = app.invoke(state)
+    res = app.invoke(state, thread_config())
     print(
         {
             "finalize": res.get("finalize"),
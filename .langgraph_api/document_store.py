@@ -1,10 +1,8 @@
-"""Legacy shim for DocumentStore utilities."""
-from app.document_store import (
-    DocumentStore,
-    ingest_canonical_docs,
-    get_document_store,
-    bootstrap_store,
-)
+"""Legacy shim for DocumentStore utilities.
+
+Attributes resolve lazily (PEP 562) so importing the shim does not load
+``app.document_store`` until one of them is used.
+"""
 
 __all__ = [
     "DocumentStore",
@@ -12,3 +10,11 @@ __all__ = [
     "get_document_store",
     "bootstrap_store",
 ]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        from app import document_store
+
+        return getattr(document_store, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,15 +1,22 @@
 """Legacy shim for launching the Digital Twin app."""
-from app.main import app, run_query, create_app
+from app.main import run_query, create_app, get_app
 
 
 def create_simple_graph():
     """Backwards-compatible wrapper returning the LangGraph app."""
-    return create_app()
+    return get_app()
 
 
 def create_multi_agent_graph():
-    """Alias to ``create_app`` for legacy imports."""
-    return create_app()
+    """Alias to ``get_app`` for legacy imports."""
+    return get_app()
+
+
+def __getattr__(name: str):
+    # Resolve ``app`` lazily so importing the shim doesn't compile the graph
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
@@ -3,6 +3,7 @@ import json
 import streamlit as st
 from app.ghc_twin import app
 from app.models import TwinState, AgentName
+from app.checkpoints import thread_config
 
 st.set_page_config(page_title="GHC Digital Twin Tester", page_icon="🧪", layout="wide")
 st.title("Green Hill Canarias – Digital Twin Tester")
@@ -68,7 +69,7 @@ if run_button:
             metadata=metadata,
             target_agent=(AgentName[target] if target != "(auto)" else None) if target else None,
         )
-        result = app.invoke(init_state)
+        result = app.invoke(init_state, thread_config())
 
         with col1:
             st.subheader("Final Answer")
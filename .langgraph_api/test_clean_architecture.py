@@ -4,11 +4,15 @@ Test suite for the clean app/ architecture implementation
 """
 import os
 import sys
+import tempfile
+import types
 sys.path.append('/workspaces/green-hill-app')
 
-from app.models import TwinState, AgentName, Message
-from app.document_store import DocumentStore
-from app.main import app, run_query, simple_mode_handler
+from app.models import TwinState, AgentName, Message, HISTORY_LIMIT, append_history
+import app.document_store as document_store
+from app.document_store import DocumentStore, QueryCache, SemanticCache
+from app.main import app, create_app, run_query, simple_mode_handler
+from app.checkpoints import thread_config
 
 def test_models():
     """Test Pydantic models and state management"""
@@ -33,6 +37,14 @@ def test_models():
     
     print("✅ Models test passed")
 
+def test_history_reducer_cap():
+    """Test that merged history keeps only the most recent entries"""
+    old = [Message(role="system", content=str(i)) for i in range(HISTORY_LIMIT)]
+    merged = append_history(old, [Message(role="strategy", content="new")])
+    assert len(merged) == HISTORY_LIMIT
+    assert merged[0].content == "1"
+    assert merged[-1].content == "new"
+
 def test_document_store():
     """Test document store functionality"""
     print("🧪 Testing Document Store...")
@@ -50,6 +62,90 @@ def test_document_store():
     
     print("✅ Document Store test passed")
 
+def test_query_cache():
+    """Test the retrieval cache's LRU eviction and expiry"""
+    cache = QueryCache(max_size=2, ttl_seconds=60)
+    cache.put("a", ("doc a",))
+    cache.put("b", ("doc b",))
+    assert cache.get("a") == ("doc a",)
+    cache.put("c", ("doc c",))  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == ("doc c",)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    expired = QueryCache(ttl_seconds=-1)
+    expired.put("a", ("doc a",))
+    assert expired.get("a") is None
+
+    cache.invalidate()
+    assert cache.get("a") is None
+
+def test_semantic_cache():
+    """Test that near-duplicate question vectors reuse cached results"""
+    cache = SemanticCache(threshold=0.95, max_size=2)
+    cache.put([1.0, 0.0], 5, ("doc a",))
+    assert cache.get([0.99, 0.05], 5) == ("doc a",)
+    assert cache.get([0.99, 0.05], 3) is None  # different k
+    assert cache.get([0.0, 1.0], 5) is None
+    cache.put([0.0, 1.0], 5, ("doc b",))
+    cache.put([0.7, 0.7], 5, ("doc c",))  # overwrites the oldest entry
+    assert cache.get([1.0, 0.0], 5) is None
+    assert cache.get([0.0, 1.0], 5) == ("doc b",)
+
+    expired = SemanticCache(threshold=0.95, ttl_seconds=-1)
+    expired.put([1.0, 0.0], 5, ("doc a",))
+    assert expired.get([1.0, 0.0], 5) is None
+
+class _FakeChroma:
+    """In-memory stand-in for langchain_chroma.Chroma, keyed by directory"""
+    rows = {}
+
+    def __init__(self, persist_directory, embedding_function):
+        self.embeddings = embedding_function
+        self._collection = self
+        self._dir = persist_directory
+
+    def add(self, ids, embeddings, documents, metadatas):
+        _FakeChroma.rows.setdefault(self._dir, []).extend(documents)
+
+    def similarity_search(self, text, k=5):
+        from langchain_core.documents import Document
+        return [Document(page_content=t) for t in _FakeChroma.rows.get(self._dir, [])[:k]]
+
+
+class _FakeEmbeddings:
+    def embed_documents(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+def test_store_loads_after_ingest_into_missing_dir():
+    """Test that a store created before its directory existed sees a later ingest"""
+    previous_chroma = sys.modules.get("langchain_chroma")
+    previous_embeddings = document_store._get_embeddings
+    sys.modules["langchain_chroma"] = types.SimpleNamespace(Chroma=_FakeChroma)
+    document_store._get_embeddings = _FakeEmbeddings
+    try:
+        root = tempfile.mkdtemp()
+        source = os.path.join(root, "memo.txt")
+        with open(source, "w") as f:
+            f.write("Solar capacity expansion plan for Gran Canaria")
+        persist_dir = os.path.join(root, "vector_store")
+
+        store = document_store.get_document_store(persist_dir)
+        assert not store.is_available()
+        assert store.query_list("solar plan") == ["No vector store available"]
+
+        assert document_store.ingest_canonical_docs([source], persist_dir) is not None
+        assert store.is_available()
+        assert store.query_list("solar plan") == [
+            "Solar capacity expansion plan for Gran Canaria"
+        ]
+    finally:
+        document_store._get_embeddings = previous_embeddings
+        if previous_chroma is None:
+            sys.modules.pop("langchain_chroma", None)
+        else:
+            sys.modules["langchain_chroma"] = previous_chroma
+
 def test_simple_mode():
     """Test simple mode functionality"""
     print("🧪 Testing Simple Mode...")
@@ -79,7 +175,7 @@ def test_multi_agent_mode():
     try:
         # Test basic invocation
         initial_state = TwinState(question="Strategic analysis of sustainable tourism opportunities")
-        result = app.invoke(initial_state)
+        result = app.invoke(initial_state, thread_config())
         
         # Verify structure
         assert "question" in result
@@ -116,6 +212,23 @@ def test_multi_agent_mode():
         assert app is not None
         print("✅ Multi-Agent structure test passed")
 
+def test_checkpointed_app_gets_default_thread():
+    """Test that a checkpointed graph runs without a caller-supplied thread_id"""
+    previous = os.environ.get("GHC_CHECKPOINT_DB")
+    os.environ["GHC_CHECKPOINT_DB"] = ":memory:"
+    try:
+        graph = create_app()
+        state = TwinState(question="Strategic options for Atlantic expansion")
+        first = graph.invoke(state, thread_config())
+        second = graph.invoke(state, thread_config())
+        # Separate threads: the second run does not resume the first
+        assert len(second["history"]) == len(first["history"])
+    finally:
+        if previous is None:
+            os.environ.pop("GHC_CHECKPOINT_DB", None)
+        else:
+            os.environ["GHC_CHECKPOINT_DB"] = previous
+
 def test_agent_enum():
     """Test agent name enumeration"""
     print("🧪 Testing Agent Enum...")
@@ -158,9 +271,14 @@ def run_all_tests():
     
     tests = [
         test_models,
+        test_history_reducer_cap,
         test_document_store,
+        test_query_cache,
+        test_semantic_cache,
+        test_store_loads_after_ingest_into_missing_dir,
         test_simple_mode,
         test_multi_agent_mode,
+        test_checkpointed_app_gets_default_thread,
         test_agent_enum,
         test_configuration_switching
     ]
@@ -20,6 +20,7 @@ import pytest
 pytestmark = pytest.mark.skip(reason="integration test script")
 
 from main import create_simple_graph, create_multi_agent_graph
+from app.checkpoints import thread_config
 
 # Test scenarios for continuous validation
 TEST_SCENARIOS = [
@@ -82,7 +83,7 @@ def test_graph_mode(mode: str, enable_green_hill_gpt: bool = False):
             }
             
             # Run the graph
-            result = app.invoke(state)
+            result = app.invoke(state, thread_config())
             execution_time = time.time() - start_time
             
             # Extract answer from result
@@ -7,16 +7,38 @@ import sys
 sys.path.append('/workspaces/green-hill-app')
 
 from app.models import TwinState, AgentName, Message
-from app.ghc_twin import app
+import app.ghc_twin as ghc_twin
+from app.checkpoints import thread_config
+from app.ghc_twin import app, digital_twin, run_batch
 
 
 def test_minimal_invoke_investor():
     state = TwinState(question="What is the ROI for EU-GMP compliance?", source_type="investor")
-    result = app.invoke(state)
+    result = app.invoke(state, thread_config())
     assert result["finalize"] is True
     assert result.get("final_answer")
 
 
+def test_investor_specialists_fan_in_to_green_hill():
+    state = TwinState(question="What is the ROI?", source_type="investor")
+    result = app.invoke(state, thread_config())
+    for key in ("strategy_output", "finance_output", "market_output", "risk_output"):
+        assert result.get(key)
+    roles = [m.role for m in result["history"]]
+    assert roles.count("GreenHillGPT") == 1
+    assert roles[-1] == "GreenHillGPT"
+    # Fan-in leaves the last targeted specialist current, as the chain did
+    assert result["current_agent"] == AgentName.RISK
+    assert result["next_agent"] is None
+
+
+def test_supplier_specialists_fan_in_to_finalize():
+    state = TwinState(question="Which permits are pending?", source_type="supplier")
+    result = app.invoke(state, thread_config())
+    assert result["current_agent"] == AgentName.COMPLIANCE
+    assert result["next_agent"] is None
+
+
 def test_agent_enums_values():
     assert AgentName.STRATEGY.value == "strategy"
     assert AgentName.FINANCE.value == "finance"
@@ -28,11 +50,74 @@ def test_agent_enums_values():
     assert AgentName.GREEN_HILL.value == "green_hill_gpt"
 
 
+def test_digital_twin_keeps_preset_context():
+    state = TwinState(
+        question="What is the ROI?",
+        target_agents=[AgentName.FINANCE],
+        context={"retrieved_docs": ["preset"]},
+    )
+    out = digital_twin(state)
+    assert out.context["retrieved_docs"] == ["preset"]
+    assert out.next_agent == AgentName.FINANCE
+
+
+def test_digital_twin_retrieves_for_preset_routes():
+    state = TwinState(question="Which markets are growing?", target_agents=[AgentName.MARKET])
+    out = digital_twin(state)
+    assert "retrieved_docs" in out.context
+
+
+def test_run_batch():
+    states = [
+        TwinState(question="What is the ROI?", source_type="investor"),
+        TwinState(question="Which permits are pending?", source_type="supplier"),
+    ]
+    results = run_batch(states)
+    assert len(results) == 2
+    assert all(r["finalize"] is True and r.get("final_answer") for r in results)
+
+
+def test_checkpointed_graph_uses_fresh_threads():
+    previous = os.environ.get("GHC_CHECKPOINT_DB")
+    os.environ["GHC_CHECKPOINT_DB"] = ":memory:"
+    try:
+        graph = ghc_twin.build_graph()
+        investor = graph.invoke(
+            TwinState(question="What is the ROI?", source_type="investor"), thread_config()
+        )
+        supplier = graph.invoke(
+            TwinState(question="Which permits are pending?", source_type="supplier"), thread_config()
+        )
+        assert investor.get("finance_output")
+        # A new thread starts clean instead of inheriting the investor outputs
+        assert supplier.get("finance_output") is None
+        assert supplier.get("strategy_output") is None
+
+        ghc_twin.app = graph
+        results = run_batch([
+            TwinState(question="What is the ROI?", source_type="investor"),
+            TwinState(question="Which permits are pending?", source_type="supplier"),
+        ])
+        assert all(r["finalize"] is True for r in results)
+    finally:
+        ghc_twin.app = app
+        if previous is None:
+            os.environ.pop("GHC_CHECKPOINT_DB", None)
+        else:
+            os.environ["GHC_CHECKPOINT_DB"] = previous
+
+
 if __name__ == "__main__":
     # Simple runner
     try:
         test_minimal_invoke_investor()
+        test_investor_specialists_fan_in_to_green_hill()
+        test_supplier_specialists_fan_in_to_finalize()
         test_agent_enums_values()
+        test_digital_twin_keeps_preset_context()
+        test_digital_twin_retrieves_for_preset_routes()
+        test_run_batch()
+        test_checkpointed_graph_uses_fresh_threads()
         print("OK")
         sys.exit(0)
     except AssertionError as e:
@@ -1,18 +1,30 @@
+from __future__ import annotations
+
 import os
-from typing import Optional, List
-from langchain_openai import OpenAIEmbeddings
-from langchain_chroma import Chroma
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, List
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
 
 # ENV:
 # OPENAI_API_KEY (required)
 # OPENAI_EMBED_MODEL (default: text-embedding-3-large)
 # GHC_VECTOR_DIR -> path to a persistent Chroma directory (mounted/available in deploy)
 
-def get_vectorstore(persist_dir: str) -> Chroma:
-    embed_model = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-large")
+@lru_cache(maxsize=4)
+def _cached_vectorstore(persist_dir: str, embed_model: str) -> Chroma:
+    # Opening Chroma loads the index from disk; do it once per process
+    from langchain_chroma import Chroma
+    from langchain_openai import OpenAIEmbeddings
+
     embeddings = OpenAIEmbeddings(model=embed_model)
     return Chroma(persist_directory=persist_dir, embedding_function=embeddings)
 
+def get_vectorstore(persist_dir: str) -> Chroma:
+    embed_model = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-large")
+    return _cached_vectorstore(persist_dir, embed_model)
+
 def get_retriever(top_k: int = 6):
     persist_dir = os.getenv("GHC_VECTOR_DIR")
     if not persist_dir or not os.path.isdir(persist_dir):
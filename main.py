@@ -9,24 +9,20 @@ using the existing LangGraph architecture in the .langgraph_api directory.
 
 import logging
 import asyncio
+import copy
 import os
+import re
 import sys
-from typing import Dict, Any, Optional, List
+import time
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Dict, Any, Optional, List
 from datetime import datetime
-import json
 
-# Add the .langgraph_api directory to the path
+# Add the .langgraph_api directory to the path. The app modules pull in
+# LangGraph and LangChain, so they are imported when an orchestrator is
+# created rather than at module import.
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.langgraph_api'))
 
-try:
-    from app.ghc_twin import build_graph
-    from app.models import TwinState, AgentName, Message
-    from app.document_store import get_document_store
-except ImportError as e:
-    logging.error(f"Import error: {e}")
-    logging.error("Make sure the .langgraph_api directory structure is correct")
-    sys.exit(1)
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -34,6 +30,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Successful responses kept for repeated (question, source_type) pairs
+RESPONSE_CACHE_SIZE = 512
+# Most recent query log entries kept per session
+SESSION_LOG_SIZE = 1000
+# Characters of each question kept in a session log entry
+LOG_QUESTION_PREVIEW = 200
+
+# Response output key -> TwinState field
+_OUTPUT_FIELDS = (
+    ('strategy', 'strategy_output'),
+    ('finance', 'finance_output'),
+    ('operations', 'operations_output'),
+    ('market', 'market_output'),
+    ('risk', 'risk_output'),
+    ('compliance', 'compliance_output'),
+    ('innovation', 'innovation_output'),
+    ('green_hill', 'green_hill_response'),
+)
+
+def _keyword_re(words: List[str]) -> "re.Pattern[str]":
+    """Compile keywords into one alternation so a question is scanned once."""
+    return re.compile("|".join(map(re.escape, words)))
+
+# High complexity indicators
+_HIGH_COMPLEXITY_RE = _keyword_re([
+    'comprehensive', 'detailed analysis', 'in-depth', 'complex',
+    'multi-faceted', 'strategic implications', 'cross-functional',
+    'integrated analysis', 'synthesis', 'comprehensive review'
+])
+
+# Medium complexity indicators
+_MEDIUM_COMPLEXITY_RE = _keyword_re([
+    'analyze', 'evaluate', 'assess', 'compare', 'investigate',
+    'examine', 'review', 'considerations', 'implications'
+])
+
+# Source type keywords, in priority order
+_SOURCE_TYPE_KEYWORDS = {
+    'master': ['master', 'comprehensive', 'complete'],
+    'investor': ['investor', 'shareholder', 'investment'],
+    'supplier': ['supplier', 'provider', 'vendor'],
+    'ocs_feed': ['operations', 'ocs', 'compliance'],
+    'web_source': ['web', 'online', 'market'],
+}
+_KEYWORD_TO_SOURCE = {
+    word: source_type
+    for source_type, words in _SOURCE_TYPE_KEYWORDS.items()
+    for word in words
+}
+_SOURCE_PRIORITY = {source_type: i for i, source_type in enumerate(_SOURCE_TYPE_KEYWORDS)}
+_SOURCE_TYPE_RE = _keyword_re(list(_KEYWORD_TO_SOURCE))
+
 class GreenHillOrchestrator:
     """
     Master orchestrator for Green Hill Canarias Digital Twin
@@ -42,35 +90,55 @@ class GreenHillOrchestrator:
     
     def __init__(self, vector_store_dir: Optional[str] = None):
         """Initialize orchestrator with document store"""
+        try:
+            from app.ghc_twin import app as ghc_app
+            from app.models import TwinState, AgentName
+            from app.document_store import get_document_store, store_generation
+            from app.checkpoints import thread_config
+        except ImportError as e:
+            logger.error("Import error: %s", e)
+            logger.error("Make sure the .langgraph_api directory structure is correct")
+            raise
+        
+        self._TwinState = TwinState
+        self._thread_config = thread_config
+        self._store_generation = store_generation
+        # Agent -> its string value, looked up instead of reading .value
+        self._agent_values = {agent: agent.value for agent in AgentName}
         self.vector_store_dir = vector_store_dir or os.getenv("VECTORSTORE_DIR", "vector_store")
         self.document_store = get_document_store(self.vector_store_dir)
-        self.graph = build_graph()
-        self.session_log = []
+        # Reuse the graph ghc_twin compiled at import and the per-directory
+        # store singleton, so extra orchestrators cost no rebuild. The
+        # compiled graph keeps no per-run state and is safe to share
+        # across concurrent ainvoke calls.
+        self.graph = ghc_app
+        self.session_log = deque(maxlen=SESSION_LOG_SIZE)
+        # Opt-in JSONL copy of every log entry, appended off the request path
+        self.session_log_path = os.getenv("GHC_SESSION_LOG_PATH")
+        self._log_queue: Optional[asyncio.Queue] = None
+        self._log_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._log_task: Optional[asyncio.Task] = None
+        # Running totals so the session summary doesn't rescan the log
+        self._total = 0
+        self._success = 0
+        self._time_sum = 0.0
+        # (question, source_type, store generation) -> (response, its
+        # session log entry); a re-ingest bumps the generation
+        self._response_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
         
         logger.info("🎯 Green Hill Orchestrator initialized")
-        logger.info(f"📁 Vector store directory: {self.vector_store_dir}")
-        logger.info(f"📚 Document store available: {self.document_store.is_available() if self.document_store else False}")
+        logger.info("📁 Vector store directory: %s", self.vector_store_dir)
+        logger.info("📚 Document store available: %s", self.document_store.is_available() if self.document_store else False)
     
     def analyze_question_complexity(self, question: str) -> str:
         """Analyze question complexity for processing"""
         question_lower = question.lower()
         
-        # High complexity indicators
-        high_indicators = [
-            'comprehensive', 'detailed analysis', 'in-depth', 'complex',
-            'multi-faceted', 'strategic implications', 'cross-functional',
-            'integrated analysis', 'synthesis', 'comprehensive review'
-        ]
-        
-        # Medium complexity indicators  
-        medium_indicators = [
-            'analyze', 'evaluate', 'assess', 'compare', 'investigate',
-            'examine', 'review', 'considerations', 'implications'
-        ]
-        
-        if any(indicator in question_lower for indicator in high_indicators):
+        if _HIGH_COMPLEXITY_RE.search(question_lower):
             return 'high'
-        elif any(indicator in question_lower for indicator in medium_indicators):
+        elif _MEDIUM_COMPLEXITY_RE.search(question_lower):
             return 'medium'
         else:
             return 'basic'
@@ -79,121 +147,265 @@ class GreenHillOrchestrator:
         """Determine source type based on question context"""
         question_lower = question.lower()
         
-        if any(word in question_lower for word in ['master', 'comprehensive', 'complete']):
-            return 'master'
-        elif any(word in question_lower for word in ['investor', 'shareholder', 'investment']):
-            return 'investor'
-        elif any(word in question_lower for word in ['supplier', 'provider', 'vendor']):
-            return 'supplier'
-        elif any(word in question_lower for word in ['operations', 'ocs', 'compliance']):
-            return 'ocs_feed'
-        elif any(word in question_lower for word in ['web', 'online', 'market']):
-            return 'web_source'
-        else:
-            return 'public'
+        # One scan over the question; the highest-priority type found wins
+        best = None
+        for match in _SOURCE_TYPE_RE.finditer(question_lower):
+            source_type = _KEYWORD_TO_SOURCE[match.group()]
+            if best is None or _SOURCE_PRIORITY[source_type] < _SOURCE_PRIORITY[best]:
+                best = source_type
+                if best == 'master':
+                    break
+        return best or 'public'
     
     async def process_query(self, question: str, source_type: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """Process a query using the LangGraph system"""
+        # Elapsed time comes from perf_counter; the wall clock is only read
+        # for the timestamps. Set before the try so the except can use them.
+        t0 = time.perf_counter()
+        start_iso = datetime.now().isoformat()
         try:
-            start_time = datetime.now()
-            logger.info(f"🤖 Processing query: {question[:100]}...")
+            logger.info("🤖 Processing query: %.100s...", question)
             
             # Determine source type if not provided
             if not source_type:
                 source_type = self.determine_source_type(question)
             
+            # Repeated questions are answered from the response cache. Extra
+            # state fields in kwargs change the run, so those calls bypass it.
+            cache_key = None if kwargs else (
+                " ".join(question.lower().split()),
+                source_type,
+                self._store_generation(),
+            )
+            if cache_key is not None:
+                cached = self._response_cache.get(cache_key)
+                if cached is not None:
+                    self._response_cache.move_to_end(cache_key)
+                    self.cache_hits += 1
+                    cached_response, cached_entry = cached
+                    processing_time = time.perf_counter() - t0
+                    # Cache hits are still queries: log them and count them
+                    self._record({
+                        **cached_entry,
+                        'timestamp': start_iso,
+                        'processing_time_seconds': processing_time,
+                        'cached': True,
+                    })
+                    response = copy.deepcopy(cached_response)
+                    response['orchestration'].update(
+                        start_time=start_iso,
+                        end_time=datetime.now().isoformat(),
+                        processing_time_seconds=processing_time,
+                        cache_hit=True,
+                    )
+                    response['session_log_entries'] = len(self.session_log)
+                    return response
+                self.cache_misses += 1
+            
             # Create initial state
-            initial_state = TwinState(
+            initial_state = self._TwinState(
                 question=question,
                 source_type=source_type,
-                timestamp=start_time.isoformat(),
+                timestamp=start_iso,
                 **kwargs
             )
             
-            # Run through LangGraph system
-            final_state = self.graph.invoke(initial_state.model_dump())
+            # Run through LangGraph system without blocking the event loop;
+            # the graph reads the model directly, so no dump round-trip
+            final_state = await self.graph.ainvoke(initial_state, self._thread_config())
             
             # Convert back to TwinState for processing
-            result_state = TwinState(**final_state)
+            result_state = self._TwinState.model_construct(**final_state)
             
             # Log the analysis
-            end_time = datetime.now()
-            processing_time = (end_time - start_time).total_seconds()
+            processing_time = time.perf_counter() - t0
             
             log_entry = {
-                'timestamp': start_time.isoformat(),
-                'question': question,
+                'timestamp': start_iso,
+                # Responses carry the full question; the log keeps a preview
+                'question': question if len(question) <= LOG_QUESTION_PREVIEW else question[:LOG_QUESTION_PREVIEW],
                 'source_type': source_type,
                 'processing_time_seconds': processing_time,
                 'success': not result_state.errors,
-                'final_agent': result_state.current_agent.value if result_state.current_agent else None,
+                'final_agent': self._agent_values.get(result_state.current_agent),
                 'errors': result_state.errors
             }
             
-            self.session_log.append(log_entry)
+            self._record(log_entry)
             
-            # Format response
-            response = {
-                'orchestration': {
-                    'question': question,
-                    'source_type': source_type,
-                    'start_time': start_time.isoformat(),
-                    'end_time': end_time.isoformat(),
-                    'processing_time_seconds': processing_time,
-                    'system_status': 'operational'
-                },
-                'result': {
-                    'success': not result_state.errors,
-                    'final_answer': result_state.final_answer,
-                    'errors': result_state.errors,
-                    'agents_involved': [agent.value for agent in result_state.target_agents],
-                    'outputs': {
-                        'strategy': result_state.strategy_output,
-                        'finance': result_state.finance_output,
-                        'operations': result_state.operations_output,
-                        'market': result_state.market_output,
-                        'risk': result_state.risk_output,
-                        'compliance': result_state.compliance_output,
-                        'innovation': result_state.innovation_output,
-                        'green_hill': result_state.green_hill_response
-                    }
-                },
-                'session_log_entries': len(self.session_log)
-            }
+            response = self._build_response(
+                question, source_type, start_iso, datetime.now().isoformat(), processing_time,
+                result_state=result_state,
+            )
+            
+            if cache_key is not None and response['result']['success']:
+                self._response_cache[cache_key] = (copy.deepcopy(response), log_entry)
+                if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                    self._response_cache.popitem(last=False)
             
-            logger.info(f"✅ Query processed successfully | Time: {processing_time:.2f}s")
+            logger.info("✅ Query processed successfully | Time: %.2fs", processing_time)
             return response
             
         except Exception as e:
-            logger.error(f"❌ Error processing query: {e}")
-            end_time = datetime.now()
-            processing_time = (end_time - start_time).total_seconds()
+            logger.error("❌ Error processing query: %s", e)
+            processing_time = time.perf_counter() - t0
+            self._record({
+                'timestamp': start_iso,
+                'question': question if len(question) <= LOG_QUESTION_PREVIEW else question[:LOG_QUESTION_PREVIEW],
+                'source_type': source_type or 'unknown',
+                'processing_time_seconds': processing_time,
+                'success': False,
+                'final_agent': None,
+                'errors': [str(e)]
+            })
             
-            return {
-                'orchestration': {
-                    'question': question,
-                    'source_type': source_type or 'unknown',
-                    'start_time': start_time.isoformat(),
-                    'end_time': end_time.isoformat(),
-                    'processing_time_seconds': processing_time,
-                    'system_status': 'error'
-                },
-                'result': {
-                    'success': False,
-                    'error': str(e),
-                    'final_answer': f"Error processing query: {e}"
-                },
-                'session_log_entries': len(self.session_log)
+            return self._build_response(
+                question, source_type or 'unknown', start_iso, datetime.now().isoformat(),
+                processing_time, error=e,
+            )
+    
+    async def process_query_stream(
+        self, question: str, source_type: Optional[str] = None, **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield each node's state update as the graph runs.
+
+        Events are ``{node_name: update}`` dicts from LangGraph's "updates"
+        stream, so a specialist's output is available as soon as that agent
+        finishes. Streamed queries bypass the response cache and session log.
+        """
+        if not source_type:
+            source_type = self.determine_source_type(question)
+        initial_state = self._TwinState(
+            question=question,
+            source_type=source_type,
+            timestamp=datetime.now().isoformat(),
+            **kwargs
+        )
+        async for event in self.graph.astream(
+            initial_state, self._thread_config(), stream_mode="updates"
+        ):
+            yield event
+    
+    def _record(self, log_entry: Dict[str, Any]) -> None:
+        """Append a log entry and fold it into the session totals"""
+        self.session_log.append(log_entry)
+        self._persist_log_entry(log_entry)
+        self._total += 1
+        self._success += int(log_entry['success'])
+        self._time_sum += log_entry['processing_time_seconds']
+    
+    def _persist_log_entry(self, entry: Dict[str, Any]) -> None:
+        """Queue a log entry for the background JSONL writer"""
+        if not self.session_log_path:
+            return
+        loop = asyncio.get_running_loop()
+        if self._log_loop is not loop:
+            # Queues are bound to one event loop; start a writer per loop
+            self._log_queue = asyncio.Queue()
+            self._log_loop = loop
+            self._log_task = loop.create_task(self._log_writer(self._log_queue))
+        self._log_queue.put_nowait(entry)
+    
+    async def _log_writer(self, queue: asyncio.Queue) -> None:
+        """Append queued log entries to session_log_path in batches"""
+        try:
+            while True:
+                batch = [await queue.get()]
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                # Shielded so shutdown can't drop a batch before its write starts
+                write = asyncio.get_running_loop().run_in_executor(None, self._append_log_lines, batch)
+                await asyncio.shield(write)
+        finally:
+            # On shutdown the loop cancels this task; keep what is still queued
+            batch = []
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch:
+                self._append_log_lines(batch)
+    
+    def _append_log_lines(self, entries: List[Dict[str, Any]]) -> None:
+        import orjson
+        
+        try:
+            with open(self.session_log_path, 'ab') as f:
+                f.write(b''.join(orjson.dumps(entry) + b'\n' for entry in entries))
+        except OSError as e:
+            logger.warning("Could not write session log: %s", e)
+    
+    def _build_response(
+        self,
+        question: str,
+        source_type: str,
+        start_iso: str,
+        end_iso: str,
+        processing_time: float,
+        result_state: Any = None,
+        error: Optional[Exception] = None,
+    ) -> Dict[str, Any]:
+        """Format a process_query response from a final state or an error"""
+        if error is None:
+            result = {
+                'success': not result_state.errors,
+                'final_answer': result_state.final_answer,
+                'errors': result_state.errors,
+                'agents_involved': list(map(self._agent_values.__getitem__, result_state.target_agents)),
+                'outputs': {key: getattr(result_state, attr) for key, attr in _OUTPUT_FIELDS},
             }
+        else:
+            result = {
+                'success': False,
+                'error': str(error),
+                'final_answer': f"Error processing query: {error}",
+            }
+        return {
+            'orchestration': {
+                'question': question,
+                'source_type': source_type,
+                'start_time': start_iso,
+                'end_time': end_iso,
+                'processing_time_seconds': processing_time,
+                'system_status': 'operational' if error is None else 'error',
+            },
+            'result': result,
+            'session_log_entries': len(self.session_log),
+        }
+    
+    async def process_batch(
+        self,
+        questions: List[str],
+        source_type: Optional[str] = None,
+        max_concurrency: int = 10,
+        **kwargs,
+    ) -> List[Dict[str, Any]]:
+        """Process many queries concurrently, at most ``max_concurrency`` at a time.
+
+        Results are returned in the order of ``questions``. process_query already
+        turns failures into error responses; anything else that escapes is
+        returned in place rather than cancelling the rest of the batch.
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def _one(question: str) -> Dict[str, Any]:
+            async with sem:
+                return await self.process_query(question, source_type, **kwargs)
+
+        return await asyncio.gather(*[_one(q) for q in questions], return_exceptions=True)
+    
+    def clear_cache(self) -> None:
+        """Drop cached responses and any graph node cache (GHC_NODE_CACHE_TTL)"""
+        self._response_cache.clear()
+        if self.graph.cache is not None:
+            self.graph.clear_cache()
     
     def get_session_summary(self) -> Dict[str, Any]:
         """Get summary of the current orchestration session"""
-        if not self.session_log:
+        if not self._total:
             return {'session_summary': 'No queries processed yet'}
         
-        total_queries = len(self.session_log)
-        successful_queries = sum(1 for log in self.session_log if log.get('success', False))
-        avg_processing_time = sum(log.get('processing_time_seconds', 0) for log in self.session_log) / total_queries
+        total_queries = self._total
+        successful_queries = self._success
+        avg_processing_time = self._time_sum / total_queries
         
         return {
             'session_summary': {
@@ -202,11 +414,21 @@ class GreenHillOrchestrator:
                 'success_rate': f"{(successful_queries/total_queries)*100:.1f}%",
                 'average_processing_time': f"{avg_processing_time:.2f}s",
                 'document_store_available': self.document_store.is_available() if self.document_store else False,
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
                 'system_status': 'operational'
             },
-            'recent_queries': self.session_log[-5:] if len(self.session_log) > 5 else self.session_log
+            'recent_queries': list(self.session_log)[-5:]
         }
 
+def __getattr__(name: str):
+    # Keep ``from main import build_graph`` working without importing
+    # LangGraph when main is imported
+    if name == "build_graph":
+        from app.ghc_twin import build_graph
+        return build_graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Global orchestrator instance
 orchestrator = None
 
@@ -223,6 +445,17 @@ async def query_system(question: str, source_type: str = "public", **kwargs) ->
     orch = get_orchestrator()
     return await orch.process_query(question, source_type, **kwargs)
 
+async def query_batch(questions: List[str], source_type: Optional[str] = None, max_concurrency: int = 10, **kwargs) -> List[Dict[str, Any]]:
+    """Query the Green Hill system with many questions concurrently"""
+    orch = get_orchestrator()
+    return await orch.process_batch(questions, source_type, max_concurrency, **kwargs)
+
+async def query_stream(question: str, source_type: Optional[str] = None, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+    """Stream per-node updates for a question as the graph runs"""
+    orch = get_orchestrator()
+    async for event in orch.process_query_stream(question, source_type, **kwargs):
+        yield event
+
 async def master_query(question: str, **kwargs) -> Dict[str, Any]:
     """Comprehensive master-level query"""
     return await query_system(question, "master", **kwargs)
@@ -242,22 +475,26 @@ def main():
         print("🔬 Testing with Real LangGraph Architecture")
         print("=" * 80)
         
+        # The three test queries run concurrently
+        result1, result2, result3 = await asyncio.gather(
+            query_system("What is Green Hill Canarias?"),
+            master_query("Provide a comprehensive analysis of the Green Hill Canarias project"),
+            investor_query("What are the investment opportunities and financial projections?"),
+        )
+        
         # Test 1: Basic query
         print("\n🤖 Test 1: Basic Public Query")
-        result1 = await query_system("What is Green Hill Canarias?")
         print(f"Success: {result1['result'].get('success', False)}")
         if result1['result'].get('final_answer'):
             print(f"Answer: {result1['result']['final_answer'][:200]}...")
         
         # Test 2: Master query
         print("\n🔗 Test 2: Master-Level Comprehensive Query")
-        result2 = await master_query("Provide a comprehensive analysis of the Green Hill Canarias project")
         print(f"Success: {result2['result'].get('success', False)}")
         print(f"Agents involved: {result2['result'].get('agents_involved', [])}")
         
         # Test 3: Investor query
         print("\n🎯 Test 3: Investor Query")
-        result3 = await investor_query("What are the investment opportunities and financial projections?")
         print(f"Success: {result3['result'].get('success', False)}")
         
         # Session summary
@@ -269,7 +506,15 @@ def main():
         
         print("\n🏆 ORCHESTRATOR TEST COMPLETE")
     
-    asyncio.run(test_orchestrator())
+    # uvloop schedules the concurrent queries with less overhead when installed
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+    if uvloop is not None and sys.platform != 'win32':
+        uvloop.run(test_orchestrator())
+    else:
+        asyncio.run(test_orchestrator())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
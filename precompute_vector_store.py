@@ -29,10 +29,12 @@ def load_docs(root: str):
     for p in tqdm(paths, desc="Loading"):
         if p.lower().endswith(".pdf"):
             try:
+                # One Document per page: no whole-file string, finer chunking
                 reader = PdfReader(p)
-                text = "\n".join(page.extract_text() or "" for page in reader.pages)
-                if text.strip():
-                    docs.append(Document(page_content=text, metadata={"source": p}))
+                for i, page in enumerate(reader.pages):
+                    text = page.extract_text() or ""
+                    if text.strip():
+                        docs.append(Document(page_content=text, metadata={"source": p, "page": i}))
             except Exception:
                 pass
         elif p.lower().endswith(".docx") and docx2txt: